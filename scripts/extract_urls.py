@@ -8,40 +8,178 @@ This script:
 - Creates URL lookup table with real data
 """
 
+import gzip
 import json
+import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 import argparse
 from tqdm import tqdm
 from datasets import load_dataset
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# First three dash-separated parts of an instance ID
+MEGAWIKA_ID_PATTERN = r'^(?P<mw>[^-]*-[^-]*-[^-]*)'
+_MW_RE = re.compile(MEGAWIKA_ID_PATTERN)
+
+
+def loads_json(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(obj):
+    """Serialize an object to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def load_famus_instances_arrow(arrow_file):
+    """Load FAMuS instance IDs from the Arrow IPC copy written by process_famus.py.
+    
+    Only the instance_id column is materialized; the file is memory-mapped so
+    the remaining columns are never parsed.
+    """
+    with pa.memory_map(str(arrow_file), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+        return table.select(['instance_id']).to_pylist()
+
 
 def extract_megawika_id(instance_id):
     """Extract MegaWika article ID from FAMuS instance ID.
     
     Example: 'EN-1282-352-frame-Abandonment' -> 'EN-1282-352'
     """
-    parts = instance_id.split('-')
-    if len(parts) >= 3:
-        return '-'.join(parts[:3])
-    return None
+    match = _MW_RE.match(instance_id)
+    return match.group('mw') if match else None
+
+
+class MegawikaIndex:
+    """MegaWika entry metadata stored column-wise.
+    
+    Each field is kept in its own list, and id_to_idx maps an upper-cased
+    entry ID to its row. This avoids one small dict per entry.
+    """
+    
+    COLUMNS = ('article_title', 'source_url', 'source_lang')
+    
+    def __init__(self):
+        self.id_to_idx = {}
+        self.article_titles = []
+        self.source_urls = []
+        self.source_langs = []
+    
+    def __len__(self):
+        return len(self.id_to_idx)
+    
+    def add(self, entry_id, article_title, source_url, source_lang):
+        """Add an entry, replacing any earlier entry with the same ID."""
+        idx = self.id_to_idx.get(entry_id)
+        if idx is None:
+            self.id_to_idx[entry_id] = len(self.article_titles)
+            self.article_titles.append(article_title)
+            self.source_urls.append(source_url)
+            self.source_langs.append(source_lang)
+        else:
+            self.article_titles[idx] = article_title
+            self.source_urls[idx] = source_url
+            self.source_langs[idx] = source_lang
+    
+    def columns(self):
+        """Return the index as a dict of equal-length columns."""
+        return {
+            'entry_id': list(self.id_to_idx),
+            'article_title': self.article_titles,
+            'source_url': self.source_urls,
+            'source_lang': self.source_langs
+        }
+    
+    @classmethod
+    def from_columns(cls, columns):
+        """Rebuild an index from the output of columns()."""
+        index = cls()
+        index.id_to_idx = {entry_id: idx for idx, entry_id in enumerate(columns['entry_id'])}
+        index.article_titles = list(columns['article_title'])
+        index.source_urls = list(columns['source_url'])
+        index.source_langs = list(columns['source_lang'])
+        return index
+    
+    def save(self, cache_path):
+        """Save the index as an Arrow IPC file, or as gzipped JSON columns without pyarrow."""
+        if pa is not None:
+            table = pa.table(self.columns())
+            with pa.ipc.new_file(str(cache_path), table.schema) as writer:
+                writer.write_table(table)
+        else:
+            # Loading is I/O-bound, so fast low-level compression pays off
+            with gzip.open(cache_path, 'wb', compresslevel=1) as f:
+                f.write(dumps_json(self.columns()))
+    
+    @classmethod
+    def load(cls, cache_path):
+        """Load an index written by save()."""
+        if pa is not None:
+            with pa.memory_map(str(cache_path), 'r') as source:
+                return cls.from_columns(pa.ipc.open_file(source).read_all().to_pydict())
+        with gzip.open(cache_path, 'rb') as f:
+            return cls.from_columns(loads_json(f.read()))
+
+
+def lookup_megawika_entries(instance_ids, megawika_index):
+    """Resolve instance IDs to (megawika_id, index row or None) pairs.
+    
+    With pyarrow available, ID extraction, upper-casing and the index lookup
+    run as vectorized compute kernels over all instance IDs at once.
+    """
+    if pa is None:
+        id_to_idx = megawika_index.id_to_idx
+        results = []
+        for instance_id in instance_ids:
+            megawika_id = extract_megawika_id(instance_id)
+            idx = id_to_idx.get(megawika_id.upper()) if megawika_id else None
+            results.append((megawika_id, idx))
+        return results
+    
+    # Entry IDs are listed in row order, so index_in positions are row indices
+    ids = pa.array(instance_ids, type=pa.string())
+    megawika_ids = pc.struct_field(pc.extract_regex(ids, pattern=MEGAWIKA_ID_PATTERN), [0])
+    positions = pc.index_in(
+        pc.utf8_upper(megawika_ids),
+        value_set=pa.array(list(megawika_index.id_to_idx), type=pa.string())
+    )
+    
+    return list(zip(megawika_ids.to_pylist(), positions.to_pylist()))
 
 
-def build_megawika_index(language='en', cache_file=None):
+def build_megawika_index(language='en', cache_file=None, limit=100000):
     """Build an index of MegaWika entries mapping entry IDs to URLs.
     
     Args:
         language: Language code (default: 'en')
         cache_file: Path to cache file for storing/loading index
+        limit: Maximum number of entries to index (0 for no limit)
     
     Returns:
-        Dictionary mapping entry_id to entry metadata
+        MegawikaIndex with article title, source URL and language per entry
     """
     # Check if we have a cached index
     if cache_file and Path(cache_file).exists():
         print(f"Loading cached MegaWika index from {cache_file}")
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return MegawikaIndex.load(cache_file)
     
     print(f"Building MegaWika index for language: {language}")
     print("This may take a while on first run...")
@@ -50,32 +188,36 @@ def build_megawika_index(language='en', cache_file=None):
     # Using streaming to avoid loading entire dataset into memory
     dataset = load_dataset('hltcoe/megawika', name=language, streaming=True, trust_remote_code=True)
     
+    # Only article titles and entries are indexed; projecting the stream keeps
+    # the long article_text bodies from being decoded for every example
+    examples = dataset[language].select_columns(['article_title', 'entries'])
+    
     # Build index
-    megawika_index = {}
+    megawika_index = MegawikaIndex()
     entries_processed = 0
     
     # Process entries
-    for example in tqdm(dataset[language], desc="Processing MegaWika entries"):
+    for example in tqdm(examples, desc="Processing MegaWika entries"):
         article_title = example.get('article_title', '')
         
         for entry in example.get('entries', []):
             entry_id = entry.get('id', '').upper()  # Normalize to uppercase
             if entry_id:
-                megawika_index[entry_id] = {
-                    'article_title': article_title,
-                    'source_url': entry.get('source_url', ''),
-                    'source_lang': entry.get('source_lang', ''),
-                    'article_text': example.get('article_text', '')[:500]  # Store snippet
-                }
+                megawika_index.add(
+                    entry_id,
+                    article_title,
+                    entry.get('source_url', ''),
+                    entry.get('source_lang', '')
+                )
                 entries_processed += 1
                 
                 # Optional: Stop after processing enough entries for demo
-                # Remove this limit for full processing
-                if entries_processed >= 100000:
-                    print(f"Processed {entries_processed} entries (demo limit)")
+                # Use limit=0 for full processing
+                if limit and entries_processed >= limit:
+                    print(f"Processed {entries_processed} entries (limit)")
                     break
         
-        if entries_processed >= 100000:
+        if limit and entries_processed >= limit:
             break
     
     print(f"Built index with {len(megawika_index)} entries")
@@ -84,13 +226,13 @@ def build_megawika_index(language='en', cache_file=None):
     if cache_file:
         cache_path = Path(cache_file)
         cache_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(megawika_index, f, indent=2)
+        megawika_index.save(cache_path)
         print(f"Cached index to {cache_file}")
     
     return megawika_index
 
 
+@lru_cache(maxsize=200_000)
 def create_wikipedia_url(article_title, lang='en'):
     """Create Wikipedia URL from article title."""
     if not article_title:
@@ -105,40 +247,48 @@ def create_url_mapping(famus_instances, megawika_index):
     
     Args:
         famus_instances: List of FAMuS instances
-        megawika_index: Pre-built MegaWika index
+        megawika_index: Pre-built MegawikaIndex
     
     Returns:
-        Dictionary mapping instance_id to URL info
+        Tuple of (dictionary mapping instance_id to URL info, mapping statistics)
     """
     url_mapping = {}
     missing_entries = []
     
+    # Statistics are accumulated while mapping rather than in later passes
+    with_source_url = 0
+    with_wikipedia_url = 0
+    article_titles_seen = set()
+    megawika_ids_seen = set()
+    
     print("Mapping FAMuS instances to MegaWika entries...")
     
-    for instance in tqdm(famus_instances, desc="Processing instances"):
-        instance_id = instance.get('instance_id')
-        if not instance_id:
-            continue
+    instances = [instance for instance in famus_instances if instance.get('instance_id')]
+    lookups = lookup_megawika_entries(
+        [instance['instance_id'] for instance in instances], megawika_index
+    )
+    
+    article_titles = megawika_index.article_titles
+    source_urls = megawika_index.source_urls
+    source_langs = megawika_index.source_langs
+    
+    for instance, (megawika_id, idx) in tqdm(zip(instances, lookups), total=len(instances),
+                                             desc="Processing instances"):
+        instance_id = instance['instance_id']
         
-        # Extract MegaWika ID from FAMuS instance ID
-        megawika_id = extract_megawika_id(instance_id)
+        # Skip instance IDs without a MegaWika article prefix
         if not megawika_id:
             continue
         
-        # Normalize to uppercase for lookup
-        megawika_id_upper = megawika_id.upper()
-        
-        # Look up in MegaWika index
-        if megawika_id_upper in megawika_index:
-            entry = megawika_index[megawika_id_upper]
-            article_title = entry.get('article_title', '')
+        if idx is not None:
+            article_title = article_titles[idx]
             
-            url_mapping[instance_id] = {
+            url_info = {
                 'megawika_id': megawika_id,
                 'article_title': article_title,
                 'wikipedia_url': create_wikipedia_url(article_title),
-                'source_url': entry.get('source_url', ''),
-                'source_lang': entry.get('source_lang', 'en')
+                'source_url': source_urls[idx],
+                'source_lang': source_langs[idx]
             }
         else:
             missing_entries.append(megawika_id)
@@ -151,7 +301,7 @@ def create_url_mapping(famus_instances, megawika_index):
                     article_title = source_text.split('\n')[0].strip()
             
             # Create entry with Wikipedia URL even if not in MegaWika
-            url_mapping[instance_id] = {
+            url_info = {
                 'megawika_id': megawika_id,
                 'article_title': article_title,
                 'wikipedia_url': create_wikipedia_url(article_title) if article_title else '',
@@ -159,18 +309,37 @@ def create_url_mapping(famus_instances, megawika_index):
                 'source_lang': 'en',
                 'note': 'Not found in MegaWika index'
             }
+        
+        url_mapping[instance_id] = url_info
+        if url_info['source_url']:
+            with_source_url += 1
+        if url_info['wikipedia_url']:
+            with_wikipedia_url += 1
+        if article_title:
+            article_titles_seen.add(article_title)
+        megawika_ids_seen.add(megawika_id)
     
     if missing_entries:
         print(f"\nWarning: {len(missing_entries)} unique MegaWika IDs not found in index")
         print(f"First 10 missing: {missing_entries[:10]}")
     
-    return url_mapping
+    mapping_stats = {
+        'instances_with_source_url': with_source_url,
+        'instances_with_wikipedia_url': with_wikipedia_url,
+        'unique_articles': len(article_titles_seen),
+        'unique_megawika_ids': len(megawika_ids_seen)
+    }
+    
+    return url_mapping, mapping_stats
 
 
 def main():
     parser = argparse.ArgumentParser(description='Extract URLs for AMuS datasets')
     parser.add_argument('--famus-dir', type=str, required=True,
                         help='Directory containing processed FAMuS data')
+    parser.add_argument('--famus-arrow', type=str, default=None,
+                        help='Arrow IPC file written by process_famus.py --arrow-file '
+                             '(used instead of the JSON chunks when given)')
     parser.add_argument('--language', type=str, default='en',
                         help='MegaWika language to use (default: en)')
     parser.add_argument('--cache-dir', type=str, default='assets/data/cache',
@@ -183,50 +352,60 @@ def main():
     
     famus_path = Path(args.famus_dir)
     output_path = Path(args.output_file)
-    cache_file = Path(args.cache_dir) / f'megawika_index_{args.language}.json'
+    cache_suffix = 'arrow' if pa is not None else 'json.gz'
+    cache_file = Path(args.cache_dir) / f'megawika_columns_{args.language}.{cache_suffix}'
     
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Load FAMuS metadata to get all instances
-    metadata_file = famus_path / 'metadata.json'
-    if not metadata_file.exists():
-        print(f"Error: FAMuS metadata not found at {metadata_file}")
-        print("Please run process_famus.py first.")
-        sys.exit(1)
-    
-    with open(metadata_file, 'r') as f:
-        metadata = json.load(f)
-    
-    # Load all FAMuS instances
-    print("Loading FAMuS instances...")
-    all_instances = []
-    num_chunks = metadata['num_chunks']
-    
-    for i in range(num_chunks):
-        chunk_file = famus_path / f'chunk_{i:04d}.json'
-        if chunk_file.exists():
-            with open(chunk_file, 'r') as f:
-                chunk_data = json.load(f)
-                all_instances.extend(chunk_data)
+    if args.famus_arrow:
+        if pa is None:
+            print("Error: pyarrow is required for --famus-arrow. Install it with: pip install pyarrow")
+            sys.exit(1)
+        
+        print(f"Loading FAMuS instances from {args.famus_arrow}...")
+        all_instances = load_famus_instances_arrow(args.famus_arrow)
+    else:
+        # Load FAMuS metadata to get all instances
+        metadata_file = famus_path / 'metadata.json'
+        if not metadata_file.exists():
+            print(f"Error: FAMuS metadata not found at {metadata_file}")
+            print("Please run process_famus.py first.")
+            sys.exit(1)
+        
+        with open(metadata_file, 'r') as f:
+            metadata = json.load(f)
+        
+        # Load all FAMuS instances
+        print("Loading FAMuS instances...")
+        all_instances = []
+        num_chunks = metadata['num_chunks']
+        
+        for i in range(num_chunks):
+            chunk_file = famus_path / f'chunk_{i:04d}.json'
+            if chunk_file.exists():
+                with open(chunk_file, 'rb') as f:
+                    chunk_data = loads_json(f.read())
+                    all_instances.extend(chunk_data)
     
     print(f"Loaded {len(all_instances)} FAMuS instances")
     
     # Build or load MegaWika index
     megawika_index = build_megawika_index(
         language=args.language,
-        cache_file=str(cache_file)
+        cache_file=str(cache_file),
+        limit=args.limit
     )
     
     # Extract URLs
     print("\nExtracting URLs from MegaWika...")
-    url_mapping = create_url_mapping(all_instances, megawika_index)
+    url_mapping, mapping_stats = create_url_mapping(all_instances, megawika_index)
     
     # Calculate statistics
-    mapped_with_source = sum(1 for v in url_mapping.values() if v.get('source_url'))
-    mapped_with_wikipedia = sum(1 for v in url_mapping.values() if v.get('wikipedia_url'))
-    unique_articles = len(set(v['article_title'] for v in url_mapping.values() if v.get('article_title')))
-    unique_megawika_ids = len(set(v['megawika_id'] for v in url_mapping.values()))
+    mapped_with_source = mapping_stats['instances_with_source_url']
+    mapped_with_wikipedia = mapping_stats['instances_with_wikipedia_url']
+    unique_articles = mapping_stats['unique_articles']
+    unique_megawika_ids = mapping_stats['unique_megawika_ids']
     
     stats = {
         'total_instances': len(all_instances),
@@ -13,44 +13,102 @@ import json
 import os
 import gzip
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import argparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 def minify_json(file_path):
     """Minify a JSON file by removing whitespace."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    
+    # orjson emits compact output directly; fall back to stdlib json otherwise
+    if orjson is not None:
+        minified = orjson.dumps(orjson.loads(raw))
+    else:
+        minified = json.dumps(json.loads(raw), separators=(',', ':')).encode('utf-8')
     
     # Write minified version
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, separators=(',', ':'))
+    with open(file_path, 'wb') as f:
+        f.write(minified)
     
     return os.path.getsize(file_path)
 
 
+# Files above this size are compressed in a streaming fashion
+STREAMING_THRESHOLD = 50 * 1024 * 1024
+
+
 def create_gzip_version(file_path):
     """Create a gzipped version of a file."""
-    gz_path = file_path + '.gz'
+    gz_path = str(file_path) + '.gz'
     
-    with open(file_path, 'rb') as f_in:
-        with gzip.open(gz_path, 'wb', compresslevel=9) as f_out:
-            shutil.copyfileobj(f_in, f_out)
+    if os.path.getsize(file_path) > STREAMING_THRESHOLD:
+        with open(file_path, 'rb') as f_in:
+            with gzip.open(gz_path, 'wb', compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out)
+    else:
+        # Data files are small enough to compress in one call
+        data = Path(file_path).read_bytes()
+        Path(gz_path).write_bytes(gzip.compress(data, compresslevel=6))
     
     return os.path.getsize(gz_path)
 
 
+def create_zstd_version(file_path):
+    """Create a Zstandard-compressed version of a file."""
+    zst_path = str(file_path) + '.zst'
+    
+    compressor = zstandard.ZstdCompressor(level=19)
+    with open(file_path, 'rb') as f_in:
+        with open(zst_path, 'wb') as f_out:
+            compressor.copy_stream(f_in, f_out)
+    
+    return os.path.getsize(zst_path)
+
+
+# File types the service worker may cache
+CACHEABLE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.png', '.jpg', '.jpeg', '.gif', '.svg')
+
+
+def walk_files(dir_path):
+    """Yield the paths of all files under a directory, recursively.
+    
+    Uses os.scandir so file type checks come from the cached directory
+    entries rather than a separate stat per path.
+    """
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
+
+
 def generate_cache_manifest(site_dir):
     """Generate a list of all cacheable assets."""
-    cacheable_extensions = {'.html', '.css', '.js', '.json', '.png', '.jpg', '.jpeg', '.gif', '.svg'}
     manifest = []
     
     site_path = Path(site_dir)
+    root = os.path.normpath(site_dir)
+    prefix_length = len(root) + 1
     
-    for file_path in site_path.rglob('*'):
-        if file_path.is_file() and file_path.suffix in cacheable_extensions:
+    for file_path in walk_files(root):
+        if file_path.endswith(CACHEABLE_EXTENSIONS):
             # Get relative path from site root
-            relative_path = str(file_path.relative_to(site_path))
+            relative_path = file_path[prefix_length:]
             
             # Skip large data files and service worker itself
             if '_data/' in relative_path or relative_path == 'sw.js':
@@ -69,31 +127,122 @@ def generate_cache_manifest(site_dir):
     return len(manifest)
 
 
-def optimize_data_files(data_dir):
-    """Optimize all JSON data files."""
+# Sidecar manifest recording the state of each data file after optimization
+OPTIMIZE_CACHE_NAME = '.optimize_cache.json'
+
+
+def load_optimize_cache(cache_path):
+    """Load the optimization manifest, or an empty one if missing or invalid."""
+    if not cache_path.exists():
+        return {}
+    
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    return cache if isinstance(cache, dict) else {}
+
+
+def is_unchanged(json_file, entry, zstd=False):
+    """Check whether a data file is unchanged since it was last optimized.
+    
+    A malformed manifest entry counts as changed, so the file is simply
+    optimized again.
+    """
+    if not entry:
+        return False
+    
+    stat = os.stat(json_file)
+    try:
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return False
+        
+        # Compressed versions must still exist (and zstd must have been produced if requested)
+        if entry['has_gz']:
+            if not os.path.exists(str(json_file) + '.gz'):
+                return False
+            if zstd and not (entry['has_zst'] and os.path.exists(str(json_file) + '.zst')):
+                return False
+    except (KeyError, TypeError):
+        return False
+    
+    return True
+
+
+def optimize_data_file(json_file, zstd=False):
+    """Minify a JSON data file and compress it if large.
+    
+    Returns:
+        Tuple of (original_size, minified_size, cache_entry)
+    """
+    # Get original size
+    original_size = os.path.getsize(json_file)
+    
+    # Minify JSON
+    minified_size = minify_json(json_file)
+    
+    # Create gzip version for large files (> 100KB)
+    has_gz = minified_size > 100 * 1024
+    if has_gz:
+        create_gzip_version(str(json_file))
+        if zstd:
+            create_zstd_version(str(json_file))
+    
+    # Record the minified file's state so unchanged files are skipped next build
+    stat = os.stat(json_file)
+    cache_entry = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'minified_size': minified_size,
+        'has_gz': has_gz,
+        'has_zst': has_gz and zstd
+    }
+    
+    return original_size, minified_size, cache_entry
+
+
+def optimize_data_files(data_dir, zstd=False):
+    """Optimize all JSON data files.
+    
+    Returns:
+        Tuple of (files_processed, bytes_saved, files_unchanged)
+    """
     data_path = Path(data_dir)
+    cache_path = data_path / OPTIMIZE_CACHE_NAME
+    cache = load_optimize_cache(cache_path)
     total_saved = 0
     files_processed = 0
     
+    # Skip already gzipped files, the manifest itself and files unchanged since the last run
+    json_files = []
+    new_cache = {}
     for json_file in data_path.rglob('*.json'):
-        # Skip already gzipped files
-        if json_file.suffix == '.gz':
+        if json_file.suffix == '.gz' or json_file.name == OPTIMIZE_CACHE_NAME:
             continue
         
-        # Get original size
-        original_size = os.path.getsize(json_file)
-        
-        # Minify JSON
-        minified_size = minify_json(json_file)
-        
-        # Create gzip version for large files (> 100KB)
-        if minified_size > 100 * 1024:
-            create_gzip_version(json_file)
-        
-        total_saved += original_size - minified_size
-        files_processed += 1
+        rel_path = json_file.relative_to(data_path).as_posix()
+        entry = cache.get(rel_path)
+        if is_unchanged(json_file, entry, zstd):
+            new_cache[rel_path] = entry
+        else:
+            json_files.append((rel_path, json_file))
+    
+    # zlib releases the GIL while compressing, so threads overlap the gzip work
+    # without the pickling overhead of worker processes
+    optimize = partial(optimize_data_file, zstd=zstd)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(optimize, [json_file for _, json_file in json_files])
+        for (rel_path, _), (original_size, minified_size, entry) in zip(json_files, results):
+            total_saved += original_size - minified_size
+            files_processed += 1
+            new_cache[rel_path] = entry
     
-    return files_processed, total_saved
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(new_cache, f, separators=(',', ':'))
+    
+    return files_processed, total_saved, len(new_cache) - files_processed
 
 
 def main():
@@ -102,15 +251,21 @@ def main():
                         help='Jekyll output directory')
     parser.add_argument('--data-dir', type=str, default='_data',
                         help='Data directory to optimize')
+    parser.add_argument('--zstd', action='store_true',
+                        help='Also write .zst versions of large data files (requires zstandard)')
     args = parser.parse_args()
     
+    if args.zstd and zstandard is None:
+        print("⚠️  zstandard is not installed, skipping .zst output (pip install zstandard)")
+        args.zstd = False
+    
     print("🚀 Starting build optimization...")
     
     # Optimize data files
     if os.path.exists(args.data_dir):
         print("\n📊 Optimizing data files...")
-        files_processed, bytes_saved = optimize_data_files(args.data_dir)
-        print(f"✅ Processed {files_processed} files, saved {bytes_saved / 1024:.1f} KB")
+        files_processed, bytes_saved, files_unchanged = optimize_data_files(args.data_dir, zstd=args.zstd)
+        print(f"✅ Processed {files_processed} files ({files_unchanged} unchanged), saved {bytes_saved / 1024:.1f} KB")
     
     # Generate cache manifest
     if os.path.exists(args.site_dir):
@@ -11,12 +11,59 @@ This script:
 """
 
 import json
+import mmap
 import os
 import sys
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate, chain
 import argparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+SPLITS = ['train', 'dev', 'test']
+
+# Shared read-only default for missing dict fields (avoids a new {} per miss)
+_EMPTY = MappingProxyType({})
+
+# Frame cache entry for frames missing from the ontology
+_MISSING_FRAME = ('', (), (), _EMPTY)
+
+
+def loads_json(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(obj):
+    """Serialize an object to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
 
 def load_ontology(ontology_path):
     """Load processed ontology data."""
@@ -25,8 +72,35 @@ def load_ontology(ontology_path):
         print(f"Warning: Ontology file {frames_file} not found. Running without ontology enrichment.")
         return None
     
-    with open(frames_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(frames_file, 'rb') as f:
+        return loads_json(f.read())
+
+
+def build_frame_cache(ontology):
+    """Precompute (definition, ancestors, descendants, all_roles) for each frame.
+    
+    Frames are far fewer than instances, so per-instance code does a single
+    lookup into this table instead of repeated nested ontology gets.
+    """
+    if not ontology:
+        return {}
+    
+    return {
+        frame_name: (
+            frame_data.get('definition', ''),
+            frame_data.get('ancestors', []),
+            frame_data.get('descendants', []),
+            frame_data.get('all_roles', {})
+        )
+        for frame_name, frame_data in ontology.items()
+    }
+
+
+def lookup_frame(frame_cache, frame_name):
+    """Return the cached (definition, ancestors, descendants, all_roles) for a frame."""
+    if not frame_cache:
+        return _MISSING_FRAME
+    return frame_cache.get(frame_name, _MISSING_FRAME)
 
 
 def normalize_annotation(annotation):
@@ -61,13 +135,22 @@ def annotations_differ(ann1_list, ann2_list):
     if len(ann1_list) != len(ann2_list):
         return True
     
-    # Create sets of (role, text, span) tuples for comparison
+    # Fast path: matching annotations usually appear in the same order, in
+    # which case no sets need to be built
+    for ann1, ann2 in zip(ann1_list, ann2_list):
+        if (ann1['role'] != ann2['role'] or ann1['text'] != ann2['text'] or
+                ann1.get('span', []) != ann2.get('span', [])):
+            break
+    else:
+        return False
+    
+    # Create sets of flat (role, text, *span) tuples for comparison
     ann1_set = {
-        (ann['role'], ann['text'], tuple(ann.get('span', [])))
+        (ann['role'], ann['text'], *ann.get('span', ()))
         for ann in ann1_list
     }
     ann2_set = {
-        (ann['role'], ann['text'], tuple(ann.get('span', [])))
+        (ann['role'], ann['text'], *ann.get('span', ()))
         for ann in ann2_list
     }
     
@@ -90,43 +173,64 @@ def triggers_differ(trigger1, trigger2):
 
 
 def versions_differ(v1_0, v1_1):
-    """Check if two versions have different annotations."""
-    # Check report annotations
-    if annotations_differ(v1_0['report']['annotations'], v1_1['report']['annotations']):
+    """Check if two versions have different annotations.
+    
+    The cheap checks (triggers, then annotation counts) run first so that
+    annotation sets are only compared when everything else matches.
+    """
+    report_10, report_11 = v1_0['report'], v1_1['report']
+    source_10, source_11 = v1_0['source'], v1_1['source']
+    
+    # Check triggers
+    if triggers_differ(report_10.get('trigger'), report_11.get('trigger')):
         return True
     
-    # Check source annotations
-    if annotations_differ(v1_0['source']['annotations'], v1_1['source']['annotations']):
+    if triggers_differ(source_10.get('trigger'), source_11.get('trigger')):
         return True
     
-    # Check triggers
-    if triggers_differ(v1_0['report'].get('trigger'), v1_1['report'].get('trigger')):
+    # Check annotation counts
+    if (len(report_10['annotations']) != len(report_11['annotations']) or
+            len(source_10['annotations']) != len(source_11['annotations'])):
         return True
     
-    if triggers_differ(v1_0['source'].get('trigger'), v1_1['source'].get('trigger')):
+    # Check report annotations
+    if annotations_differ(report_10['annotations'], report_11['annotations']):
         return True
     
-    return False
+    # Check source annotations
+    return annotations_differ(source_10['annotations'], source_11['annotations'])
 
 
-def process_famus_10_instance(instance, ontology=None):
-    """Process a FAMuS 1.0 instance."""
-    frame_name = instance.get('frame', '')
+def process_famus_10_instance(instance, frame_name, frame_cache=None):
+    """Process a FAMuS 1.0 instance whose (interned) frame name has been read."""
+    get = instance.get
+    
+    # Role definitions from the ontology, if available
+    all_roles = lookup_frame(frame_cache, frame_name)[3]
+    
+    # Extract annotations, enriching them with role definitions as they are built.
+    # Role and label strings repeat across instances, so they are interned.
+    intern = sys.intern
     
-    # Extract and normalize annotations
     def convert_role_annotations(role_dict):
         annotations = []
         for role, spans_list in role_dict.items():
             if role == 'role-spans-indices-in-all-spans':
                 continue
+            role = intern(role)
+            role_definition = all_roles.get(role)
+            if role_definition is None:
+                role_definition = ''
             for span_info in spans_list:
                 if len(span_info) >= 6:
+                    text, start_char, end_char, start_token, end_token, label = span_info[:6]
                     annotations.append({
-                        'text': span_info[0],
-                        'span': [span_info[1], span_info[2]],
-                        'token_span': [span_info[3], span_info[4]],
+                        'text': text,
+                        'span': [start_char, end_char],
+                        'token_span': [start_token, end_token],
                         'role': role,
-                        'label': span_info[5] if span_info[5] else role
+                        'label': intern(label) if label else role,
+                        'role_definition': role_definition
                     })
         return annotations
     
@@ -145,89 +249,78 @@ def process_famus_10_instance(instance, ontology=None):
             'frame': frame_name
         }
     
-    report_dict = instance.get('report_dict', {})
-    source_dict = instance.get('source_dict', {})
+    report_dict = get('report_dict') or _EMPTY
+    source_dict = get('source_dict') or _EMPTY
     
-    # Build normalized structure
+    # Build the structure; annotations and triggers are already in the
+    # normalized format produced by normalize_annotation/normalize_trigger
     processed = {
         'report': {
             'text': report_dict.get('doctext', ''),
-            'annotations': convert_role_annotations(report_dict.get('role_annotations', {})),
+            'annotations': convert_role_annotations(report_dict.get('role_annotations') or _EMPTY),
             'trigger': extract_trigger(report_dict, frame_name)
         },
         'source': {
             'text': source_dict.get('doctext', ''),
-            'annotations': convert_role_annotations(source_dict.get('role_annotations', {})),
+            'annotations': convert_role_annotations(source_dict.get('role_annotations') or _EMPTY),
             'trigger': extract_trigger(source_dict, frame_name)
         }
     }
     
-    # Enrich with ontology if available
-    if ontology and frame_name in ontology:
-        frame_data = ontology[frame_name]
-        all_roles = frame_data.get('all_roles', {})
-        
-        for ann in processed['report']['annotations']:
-            if ann['role'] in all_roles:
-                ann['role_definition'] = all_roles[ann['role']]
-        
-        for ann in processed['source']['annotations']:
-            if ann['role'] in all_roles:
-                ann['role_definition'] = all_roles[ann['role']]
-    
-    # Normalize all annotations
-    processed['report']['annotations'] = [
-        normalize_annotation(ann) for ann in processed['report']['annotations']
-    ]
-    processed['source']['annotations'] = [
-        normalize_annotation(ann) for ann in processed['source']['annotations']
-    ]
-    processed['report']['trigger'] = normalize_trigger(processed['report']['trigger'])
-    processed['source']['trigger'] = normalize_trigger(processed['source']['trigger'])
-    
     return processed
 
 
-def process_famus_11_instance(instance, ontology=None):
+def compute_char_positions(tokens):
+    """Return the start offset of each token in ' '.join(tokens)."""
+    if not tokens:
+        return []
+    
+    return list(accumulate((len(token) + 1 for token in tokens[:-1]), initial=0))
+
+
+def process_famus_11_instance(instance, frame_cache=None):
     """Process a FAMuS 1.1 instance."""
-    trigger_data = instance.get('trigger', {})
-    frame_name = trigger_data.get('frame', '')
+    get = instance.get
+    trigger_data = get('trigger') or _EMPTY
+    frame_name = sys.intern(trigger_data.get('frame', ''))
     
     # Get tokens for text reconstruction
-    report_tokens = instance.get('report', [])
-    source_tokens = instance.get('source', [])
+    report_tokens = get('report') or []
+    source_tokens = get('source') or []
     
-    # Reconstruct text
+    # Reconstruct text, joining each document's tokens exactly once
     report_text = ' '.join(report_tokens)
     source_text = ' '.join(source_tokens)
     
-    # Convert template to annotations
-    def convert_template(template_dict, tokens):
+    # Character offset of each token, computed once per token list
+    report_positions = compute_char_positions(report_tokens)
+    source_positions = compute_char_positions(source_tokens)
+    
+    # Role definitions from the ontology, if available
+    all_roles = lookup_frame(frame_cache, frame_name)[3]
+    
+    # Convert template to annotations, enriching them with role definitions
+    def convert_template(template_dict, tokens, char_positions):
         annotations = []
-        
-        # Calculate character positions
-        char_positions = []
-        current_pos = 0
-        for i, token in enumerate(tokens):
-            char_positions.append(current_pos)
-            current_pos += len(token)
-            if i < len(tokens) - 1:
-                current_pos += 1
+        append = annotations.append
+        num_tokens = len(tokens)
+        last_token = num_tokens - 1
         
         for role, role_data in template_dict.items():
             if 'arguments' in role_data:
+                role = sys.intern(role)
+                role_definition = all_roles.get(role, '')
                 for arg in role_data['arguments']:
                     if 'start_token' in arg and 'end_token' in arg:
-                        arg_tokens = arg.get('tokens', [])
-                        text = ' '.join(arg_tokens) if arg_tokens else ''
+                        text = ' '.join(arg.get('tokens') or ())
                         
                         start_token = arg['start_token']
                         end_token = arg['end_token']
                         
                         # Calculate character span (inclusive end like FAMuS 1.0)
-                        if start_token < len(char_positions) and end_token < len(char_positions):
+                        if start_token < num_tokens and end_token < num_tokens:
                             start_char = char_positions[start_token]
-                            if end_token < len(tokens) - 1:
+                            if end_token < last_token:
                                 # Not the last token - end at last char of end_token (before space)
                                 end_char = char_positions[end_token + 1] - 2
                             else:
@@ -237,30 +330,22 @@ def process_famus_11_instance(instance, ontology=None):
                             start_char = 0
                             end_char = len(text)
                         
-                        annotations.append({
+                        append({
                             'text': text,
                             'span': [start_char, end_char],
                             'token_span': [start_token, end_token],
                             'role': role,
-                            'label': role
+                            'label': role,
+                            'role_definition': role_definition
                         })
         
         return annotations
     
     # Extract trigger
-    def extract_trigger_11(trigger_dict, tokens):
+    def extract_trigger_11(trigger_dict, tokens, char_positions):
         if not trigger_dict:
             return None
         
-        # Calculate character positions
-        char_positions = []
-        current_pos = 0
-        for i, token in enumerate(tokens):
-            char_positions.append(current_pos)
-            current_pos += len(token)
-            if i < len(tokens) - 1:
-                current_pos += 1
-        
         start_token = trigger_dict.get('start_token')
         end_token = trigger_dict.get('end_token')
         
@@ -277,67 +362,37 @@ def process_famus_11_instance(instance, ontology=None):
             end_char = None
         
         return {
-            'text': ' '.join(trigger_dict.get('tokens', [])),
+            'text': ' '.join(trigger_dict.get('tokens') or ()),
             'start_char': start_char,
             'end_char': end_char,
             'start_token': start_token,
             'end_token': end_token,
-            'frame': trigger_dict.get('frame', '')
+            'frame': frame_name
         }
     
-    # Build normalized structure
+    # Build the structure; annotations and triggers are already in the
+    # normalized format produced by normalize_annotation/normalize_trigger
     processed = {
         'report': {
             'text': report_text,
-            'annotations': convert_template(instance.get('report_template', {}), report_tokens),
-            'trigger': extract_trigger_11(trigger_data, report_tokens)
+            'annotations': convert_template(get('report_template') or _EMPTY, report_tokens, report_positions),
+            'trigger': extract_trigger_11(trigger_data, report_tokens, report_positions)
         },
         'source': {
             'text': source_text,
-            'annotations': convert_template(instance.get('source_template', {}), source_tokens),
+            'annotations': convert_template(get('source_template') or _EMPTY, source_tokens, source_positions),
             'trigger': None  # Source trigger not in FAMuS 1.1
         }
     }
     
-    # Enrich with ontology if available
-    if ontology and frame_name in ontology:
-        frame_data = ontology[frame_name]
-        all_roles = frame_data.get('all_roles', {})
-        
-        for ann in processed['report']['annotations']:
-            if ann['role'] in all_roles:
-                ann['role_definition'] = all_roles[ann['role']]
-        
-        for ann in processed['source']['annotations']:
-            if ann['role'] in all_roles:
-                ann['role_definition'] = all_roles[ann['role']]
-    
-    # Normalize all annotations
-    processed['report']['annotations'] = [
-        normalize_annotation(ann) for ann in processed['report']['annotations']
-    ]
-    processed['source']['annotations'] = [
-        normalize_annotation(ann) for ann in processed['source']['annotations']
-    ]
-    processed['report']['trigger'] = normalize_trigger(processed['report']['trigger'])
-    processed['source']['trigger'] = normalize_trigger(processed['source']['trigger'])
-    
     return processed
 
 
-def create_unified_instance(instance_id, frame, v10_data, v11_data, ontology=None):
+def create_unified_instance(instance_id, frame, v10_data, v11_data, frame_cache=None):
     """Create a unified instance with both versions."""
     # Get frame data from ontology
-    frame_definition = ''
     frame_gloss = ''
-    frame_ancestors = []
-    frame_descendants = []
-    
-    if ontology and frame in ontology:
-        frame_data = ontology[frame]
-        frame_definition = frame_data.get('definition', '')
-        frame_ancestors = frame_data.get('ancestors', [])
-        frame_descendants = frame_data.get('descendants', [])
+    frame_definition, frame_ancestors, frame_descendants, _ = lookup_frame(frame_cache, frame)
     
     # Check if versions differ
     has_differences = versions_differ(v10_data, v11_data)
@@ -355,10 +410,282 @@ def create_unified_instance(instance_id, frame, v10_data, v11_data, ontology=Non
     }
 
 
-def chunk_data(data, chunk_size=100):
-    """Split data into chunks."""
-    for i in range(0, len(data), chunk_size):
-        yield data[i:i + chunk_size]
+def collect_roles(version_data):
+    """Return the set of roles annotated in a version's report and source."""
+    return frozenset(ann['role'] for ann in chain(version_data['report']['annotations'],
+                                                 version_data['source']['annotations']))
+
+
+def create_search_entry(idx, instance, role_lists=None, report_preview=None, source_preview=None):
+    """Create the search index entry for a unified instance.
+    
+    role_lists interns the sorted role list per distinct role set, so
+    instances sharing a role set (typically of the same frame) reuse it.
+    Text previews are sliced from the v1.0 texts unless precomputed.
+    """
+    # Use v1.0 for search by default
+    v10 = instance['v1_0']
+    
+    role_set = collect_roles(v10)
+    if role_lists is None:
+        roles = sorted(role_set)
+    else:
+        roles = role_lists.get(role_set)
+        if roles is None:
+            roles = role_lists[role_set] = sorted(role_set)
+    
+    return {
+        'id': idx,
+        'instance_id': instance['instance_id'],
+        'frame_name': instance['frame'],
+        'frame_gloss': instance['frame_gloss'],
+        'frame_definition': instance['frame_definition'],
+        'frame_ancestors': instance['frame_ancestors'],
+        'report_text': report_preview if report_preview is not None else v10['report']['text'][:500],
+        'source_text': source_preview if source_preview is not None else v10['source']['text'][:500],
+        'roles': roles,
+        'has_differences': instance['has_differences']
+    }
+
+
+# Frame cache shared with worker processes, set once per worker by init_worker
+_worker_frame_cache = None
+
+
+def init_worker(frame_cache):
+    """Store the frame cache in a worker process so it is not re-sent per task."""
+    global _worker_frame_cache
+    _worker_frame_cache = frame_cache
+
+
+def build_newline_index(mm):
+    """Return the byte offset of every newline in a memory-mapped file."""
+    if np is not None:
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == 0x0A)
+        del buf  # Release the buffer export so the mmap can be closed
+        return newlines
+    
+    newlines = []
+    position = mm.find(b'\n')
+    while position != -1:
+        newlines.append(position)
+        position = mm.find(b'\n', position + 1)
+    return newlines
+
+
+def find_shard_offsets(split_file, num_shards):
+    """Split a JSONL file into byte ranges holding roughly equal line counts.
+    
+    Shard boundaries are taken from a one-time newline index, so every range
+    starts and ends on a line boundary.
+    """
+    size = split_file.stat().st_size
+    if size == 0:
+        return []
+    if num_shards <= 1:
+        return [(0, size)]
+    
+    with open(split_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        newlines = build_newline_index(mm)
+    
+    num_lines = len(newlines)
+    offsets = [0]
+    for i in range(1, num_shards):
+        line_count = num_lines * i // num_shards
+        if line_count == 0:
+            continue
+        position = int(newlines[line_count - 1]) + 1
+        if offsets[-1] < position < size:
+            offsets.append(position)
+    
+    offsets.append(size)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def iter_famus_10_shard(split_file, split, byte_start, byte_end):
+    """Yield the processed FAMuS 1.0 records within a byte range of a JSONL file.
+    
+    The file is memory-mapped and each line is sliced out as bytes and handed
+    straight to the JSON parser, without buffered readline calls or a UTF-8
+    decode. Records are processed one at a time as they are consumed.
+    """
+    if byte_start >= byte_end:
+        return
+    
+    with open(split_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = byte_start
+        while position < byte_end:
+            line_end = mm.find(b'\n', position, byte_end)
+            if line_end == -1:
+                line_end = byte_end
+            line = mm[position:line_end]
+            position = line_end + 1
+            if line.strip():
+                instance = loads_json(line)
+                # Frame names repeat across instances, so they are interned
+                frame = sys.intern(instance.get('frame', ''))
+                yield (
+                    instance['instance_id'],
+                    frame,
+                    split,
+                    process_famus_10_instance(instance, frame, _worker_frame_cache)
+                )
+
+
+def process_famus_10_shard(split_file, split, byte_start, byte_end):
+    """Process a FAMuS 1.0 shard in a worker process, returning its records as a list."""
+    return list(iter_famus_10_shard(split_file, split, byte_start, byte_end))
+
+
+def iter_famus_11_split(split_file):
+    """Yield the raw instances of a FAMuS 1.1 split file (a JSON array).
+    
+    With ijson installed the array is parsed incrementally, so only one raw
+    instance is held at a time; otherwise the whole file is parsed at once.
+    """
+    with open(split_file, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'item', use_float=True)
+        else:
+            yield from loads_json(f.read())
+
+
+def iter_famus_10_instances(v10_path, frame_cache=None, workers=1):
+    """Yield (instance_id, frame, split, processed) for each FAMuS 1.0 record.
+    
+    Each split file is divided into byte-range shards that are processed in
+    parallel when workers > 1. Results are yielded in file order, with at
+    most workers + 1 shards in flight so finished shards do not pile up
+    ahead of the consumer.
+    """
+    shards = []
+    for split in SPLITS:
+        split_file = v10_path / f'{split}.jsonl'
+        if split_file.exists():
+            print(f"  Processing {split} split...")
+            for byte_start, byte_end in find_shard_offsets(split_file, workers):
+                shards.append((str(split_file), split, byte_start, byte_end))
+    
+    if not shards:
+        return
+    
+    if workers <= 1:
+        init_worker(frame_cache)
+        for shard in shards:
+            yield from iter_famus_10_shard(*shard)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(frame_cache,)) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(process_famus_10_shard, *shard))
+            if len(pending) > workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def famus_arrow_schema():
+    """Arrow schema for the columnar copy of the unified FAMuS chunks."""
+    annotation = pa.struct([
+        ('text', pa.string()),
+        ('span', pa.list_(pa.int64())),
+        ('token_span', pa.list_(pa.int64())),
+        ('role', pa.string()),
+        ('label', pa.string()),
+        ('role_definition', pa.string())
+    ])
+    return pa.schema([
+        ('instance_id', pa.string()),
+        ('frame', pa.string()),
+        ('frame_gloss', pa.string()),
+        ('split', pa.dictionary(pa.int8(), pa.string())),
+        ('report_text', pa.large_string()),
+        ('source_text', pa.large_string()),
+        ('report_annotations', pa.list_(annotation)),
+        ('source_annotations', pa.list_(annotation)),
+        ('frame_ancestors', pa.list_(pa.string()))
+    ])
+
+
+def chunk_to_record_batch(chunk):
+    """Convert a chunk of unified instances to an Arrow record batch (v1.0 view)."""
+    schema = famus_arrow_schema()
+    columns = {
+        'instance_id': [inst['instance_id'] for inst in chunk],
+        'frame': [inst['frame'] for inst in chunk],
+        'frame_gloss': [inst['frame_gloss'] for inst in chunk],
+        'report_text': [inst['v1_0']['report']['text'] for inst in chunk],
+        'source_text': [inst['v1_0']['source']['text'] for inst in chunk],
+        'report_annotations': [inst['v1_0']['report']['annotations'] for inst in chunk],
+        'source_annotations': [inst['v1_0']['source']['annotations'] for inst in chunk],
+        'frame_ancestors': [inst['frame_ancestors'] for inst in chunk]
+    }
+    
+    arrays = []
+    for field in schema:
+        if field.name == 'split':
+            # Use the same dictionary for every batch; the IPC file format does
+            # not allow dictionary replacement between batches
+            indices = pa.array([SPLITS.index(inst['split']) for inst in chunk], type=pa.int8())
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(SPLITS)))
+        else:
+            arrays.append(pa.array(columns[field.name], type=field.type))
+    
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_file(path, data):
+    """Write bytes to a file."""
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_chunk(output_path, idx, chunk, file_writer, arrow_writer=None):
+    """Write a single chunk of unified instances.
+    
+    The chunk is serialized here and its file is written on the file_writer
+    executor, so disk I/O overlaps with building the next chunk. Returns the
+    Arrow batch (or None) and the future for the file write.
+    """
+    chunk_file = output_path / f'chunk_{idx:04d}.json'
+    write_future = file_writer.submit(write_file, chunk_file, dumps_json(chunk))
+    
+    batch = None
+    if arrow_writer is not None:
+        batch = chunk_to_record_batch(chunk)
+        arrow_writer.write_batch(batch)
+    
+    print(f"Saved chunk {idx} with {len(chunk)} instances")
+    return batch, write_future
+
+
+def write_search_entries(search_file, first_idx, chunk, role_lists, batch=None):
+    """Append a chunk's entries to the search index JSON array being streamed.
+    
+    When the chunk was also written as an Arrow batch, the 500-character text
+    previews are sliced from its text columns with one kernel per column.
+    """
+    if batch is not None:
+        report_previews = pc.utf8_slice_codeunits(batch.column('report_text'), 0, 500).to_pylist()
+        source_previews = pc.utf8_slice_codeunits(batch.column('source_text'), 0, 500).to_pylist()
+    else:
+        report_previews = source_previews = [None] * len(chunk)
+    
+    entries = b','.join([
+        dumps_json(create_search_entry(
+            first_idx + offset, instance, role_lists,
+            report_previews[offset], source_previews[offset]
+        ))
+        for offset, instance in enumerate(chunk)
+    ])
+    if first_idx:
+        search_file.write(b',')
+    search_file.write(entries)
 
 
 def main():
@@ -373,8 +700,17 @@ def main():
                         help='Directory containing processed ontology data')
     parser.add_argument('--chunk-size', type=int, default=100,
                         help='Number of records per JSON file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for FAMuS 1.0 processing (default: 1, in-process)')
+    parser.add_argument('--arrow-file', type=str, default=None,
+                        help='Optional Arrow IPC file to also write the unified chunks to '
+                             '(read by extract_urls.py --famus-arrow)')
     args = parser.parse_args()
     
+    if args.arrow_file and pa is None:
+        print("Error: pyarrow is required for --arrow-file. Install it with: pip install pyarrow")
+        sys.exit(1)
+    
     v10_path = Path(args.famus10_dir)
     v11_path = Path(args.famus11_dir)
     output_path = Path(args.output_dir)
@@ -383,140 +719,120 @@ def main():
     # Create output directory
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Load ontology
+    # Load ontology and precompute per-frame lookups
     ontology = load_ontology(ontology_path)
+    frame_cache = build_frame_cache(ontology)
     
-    # Load FAMuS 1.0 data
-    print("Loading FAMuS 1.0 data...")
-    v10_instances = {}
-    splits_10 = {}
+    arrow_writer = None
+    if args.arrow_file:
+        Path(args.arrow_file).parent.mkdir(parents=True, exist_ok=True)
+        arrow_writer = pa.ipc.new_file(args.arrow_file, famus_arrow_schema())
     
-    for split in ['train', 'dev', 'test']:
-        split_file = v10_path / f'{split}.jsonl'
-        if split_file.exists():
-            print(f"  Processing {split} split...")
-            with open(split_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        instance = json.loads(line)
-                        instance_id = instance['instance_id']
-                        frame = instance.get('frame', '')
-                        v10_instances[instance_id] = {
-                            'data': process_famus_10_instance(instance, ontology),
-                            'frame': frame,
-                            'split': split
-                        }
-                        splits_10[instance_id] = split
-    
-    print(f"  Loaded {len(v10_instances)} FAMuS 1.0 instances")
-    
-    # Load FAMuS 1.1 data
+    # Load FAMuS 1.1 data first so FAMuS 1.0 records can be joined as they stream in
     print("Loading FAMuS 1.1 data...")
     v11_instances = {}
     
-    for split in ['train', 'dev', 'test']:
+    for split in SPLITS:
         split_file = v11_path / f'{split}.json'
         if split_file.exists():
             print(f"  Processing {split} split...")
-            with open(split_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for instance in data:
-                    instance_id = instance['instance_id']
-                    v11_instances[instance_id] = process_famus_11_instance(instance, ontology)
+            for instance in iter_famus_11_split(split_file):
+                instance_id = instance['instance_id']
+                v11_instances[instance_id] = process_famus_11_instance(instance, frame_cache)
     
     print(f"  Loaded {len(v11_instances)} FAMuS 1.1 instances")
     
-    # Create unified instances
-    print("Creating unified instances...")
-    unified_instances = []
+    # Stream FAMuS 1.0 data (the base, since it has split information), writing
+    # unified chunks and their search index entries as soon as a chunk fills
+    print("Loading FAMuS 1.0 data and creating unified instances...")
+    v10_count = 0
+    total_instances = 0
     instances_with_differences = 0
+    num_chunks = 0
+    chunk = []
+    frames_seen = set()
+    split_counts = {'train': 0, 'dev': 0, 'test': 0}
+    frame_index = defaultdict(list)
+    role_lists = {}
+    chunk_writes = []
     
-    # Use FAMuS 1.0 as the base (it has split information)
-    for instance_id, v10_info in v10_instances.items():
-        v10_data = v10_info['data']
-        frame = v10_info['frame']
-        split = v10_info['split']
+    with open(output_path / 'search_index.json', 'wb') as search_file, \
+            ThreadPoolExecutor(max_workers=1) as file_writer:
+        search_file.write(b'[')
         
-        # Get corresponding v1.1 data
-        v11_data = v11_instances.get(instance_id)
-        
-        if v11_data:
-            unified = create_unified_instance(instance_id, frame, v10_data, v11_data, ontology)
+        for instance_id, frame, split, v10_data in iter_famus_10_instances(v10_path, frame_cache, args.workers):
+            v10_count += 1
+            
+            # Get corresponding v1.1 data, releasing it from the lookup table so
+            # that only unwritten instances stay resident
+            v11_data = v11_instances.pop(instance_id, None)
+            if not v11_data:
+                print(f"  Warning: No FAMuS 1.1 data for {instance_id}")
+                continue
+            
+            unified = create_unified_instance(instance_id, frame, v10_data, v11_data, frame_cache)
             unified['split'] = split
-            unified_instances.append(unified)
             
+            idx = total_instances
+            total_instances += 1
             if unified['has_differences']:
                 instances_with_differences += 1
-        else:
-            print(f"  Warning: No FAMuS 1.1 data for {instance_id}")
+            frames_seen.add(frame)
+            split_counts[split] += 1
+            
+            frame_index[frame].append({
+                'instance_id': instance_id,
+                'idx': idx,
+                'has_differences': unified['has_differences']
+            })
+            
+            chunk.append(unified)
+            if len(chunk) == args.chunk_size:
+                batch, write_future = write_chunk(output_path, num_chunks, chunk, file_writer, arrow_writer)
+                chunk_writes.append(write_future)
+                write_search_entries(search_file, idx + 1 - len(chunk), chunk, role_lists, batch)
+                num_chunks += 1
+                chunk = []
+        
+        # Flush the final partial chunk
+        if chunk:
+            batch, write_future = write_chunk(output_path, num_chunks, chunk, file_writer, arrow_writer)
+            chunk_writes.append(write_future)
+            write_search_entries(search_file, total_instances - len(chunk), chunk, role_lists, batch)
+            num_chunks += 1
+        
+        search_file.write(b']')
+        
+        # Surface any error from the background chunk writes
+        for write_future in chunk_writes:
+            write_future.result()
     
-    print(f"Created {len(unified_instances)} unified instances")
-    print(f"Instances with differences: {instances_with_differences} ({instances_with_differences/len(unified_instances)*100:.1f}%)")
+    if arrow_writer is not None:
+        arrow_writer.close()
+        print(f"Saved Arrow copy of chunks to {args.arrow_file}")
+    
+    print(f"  Loaded {v10_count} FAMuS 1.0 instances")
+    print(f"Created {total_instances} unified instances")
+    print(f"Instances with differences: {instances_with_differences} ({instances_with_differences/total_instances*100:.1f}%)")
     
     # Create metadata
     metadata = {
-        'total_instances': len(unified_instances),
+        'total_instances': total_instances,
         'chunk_size': args.chunk_size,
-        'num_chunks': (len(unified_instances) + args.chunk_size - 1) // args.chunk_size,
+        'num_chunks': num_chunks,
         'instances_with_differences': instances_with_differences,
-        'percentage_with_differences': round(instances_with_differences / len(unified_instances) * 100, 2),
-        'frames': list(set(inst['frame'] for inst in unified_instances)),
-        'splits': {
-            'train': sum(1 for inst in unified_instances if inst['split'] == 'train'),
-            'dev': sum(1 for inst in unified_instances if inst['split'] == 'dev'),
-            'test': sum(1 for inst in unified_instances if inst['split'] == 'test')
-        }
+        'percentage_with_differences': round(instances_with_differences / total_instances * 100, 2),
+        'frames': list(frames_seen),
+        'splits': split_counts
     }
     
     # Save metadata
     with open(output_path / 'metadata.json', 'w', encoding='utf-8') as f:
         json.dump(metadata, f, indent=2)
     
-    # Save chunked data
-    for idx, chunk in enumerate(chunk_data(unified_instances, args.chunk_size)):
-        chunk_file = output_path / f'chunk_{idx:04d}.json'
-        with open(chunk_file, 'w', encoding='utf-8') as f:
-            json.dump(chunk, f, separators=(',', ':'))
-        print(f"Saved chunk {idx} with {len(chunk)} instances")
-    
-    # Create frame index
-    frame_index = defaultdict(list)
-    for idx, instance in enumerate(unified_instances):
-        frame = instance['frame']
-        frame_index[frame].append({
-            'instance_id': instance['instance_id'],
-            'idx': idx,
-            'has_differences': instance['has_differences']
-        })
-    
-    with open(output_path / 'frame_index.json', 'w', encoding='utf-8') as f:
-        json.dump(dict(frame_index), f, indent=2)
-    
-    # Create search index
-    search_data = []
-    for idx, instance in enumerate(unified_instances):
-        # Use v1.0 for search by default
-        v10 = instance['v1_0']
-        search_entry = {
-            'id': idx,
-            'instance_id': instance['instance_id'],
-            'frame_name': instance['frame'],
-            'frame_gloss': instance['frame_gloss'],
-            'frame_definition': instance['frame_definition'],
-            'frame_ancestors': instance['frame_ancestors'],
-            'report_text': v10['report']['text'][:500],
-            'source_text': v10['source']['text'][:500],
-            'roles': list(set(
-                ann['role'] for ann in 
-                v10['report']['annotations'] + v10['source']['annotations']
-                if 'role' in ann
-            )),
-            'has_differences': instance['has_differences']
-        }
-        search_data.append(search_entry)
-    
-    with open(output_path / 'search_index.json', 'w', encoding='utf-8') as f:
-        json.dump(search_data, f, separators=(',', ':'))
+    # frame_index.json is only read by scripts (process_seamus.py), so keep it compact
+    with open(output_path / 'frame_index.json', 'wb') as f:
+        f.write(dumps_json(frame_index))
     
     print(f"\nProcessing complete!")
     print(f"Output saved to: {output_path}")
@@ -525,4 +841,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -16,62 +16,82 @@ from pathlib import Path
 from collections import defaultdict
 import argparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads_json(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(obj, indent=False):
+    """Serialize an object to UTF-8 JSON bytes, compact or indented by two spaces."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def extract_role_definitions(roles):
+    """Map each role name to its definition, skipping roles without one."""
+    return {
+        role_name: role_info['definition']
+        for role_name, role_info in roles.items()
+        if isinstance(role_info, dict) and 'definition' in role_info
+    }
+
 
 def process_frame(frame_name, frame_data):
     """Process a single frame from the ontology."""
-    processed = {
+    return {
         'name': frame_name,
         'definition': frame_data.get('definition', ''),
         'ancestors': frame_data.get('ancestors', []),
         'descendants': frame_data.get('descendants', []),
-        'core_roles': {},
-        'all_roles': {}
+        # Flat role -> definition maps, so consumers need a single lookup per role
+        'core_roles': extract_role_definitions(frame_data.get('core roles', {})),
+        'all_roles': extract_role_definitions(frame_data.get('roles', {}))  # Including non-core
     }
-    
-    # Extract core roles
-    core_roles = frame_data.get('core roles', {})
-    for role_name, role_info in core_roles.items():
-        if isinstance(role_info, dict) and 'definition' in role_info:
-            processed['core_roles'][role_name] = role_info['definition']
-    
-    # Extract all roles (including non-core)
-    all_roles = frame_data.get('roles', {})
-    for role_name, role_info in all_roles.items():
-        if isinstance(role_info, dict) and 'definition' in role_info:
-            processed['all_roles'][role_name] = role_info['definition']
-    
-    return processed
 
 
 def create_hierarchy_index(frames):
     """Create an index for frame hierarchy navigation."""
     hierarchy = {
         'roots': [],  # Frames with no ancestors
-        'children': defaultdict(set),  # Parent -> {children} (using set to avoid duplicates)
-        'parents': defaultdict(set)     # Child -> {parents} (using set to avoid duplicates)
+        'children': defaultdict(list),  # Parent -> [children]
+        'parents': {}                   # Child -> [parents]
     }
+    children = hierarchy['children']
     
     for frame_name, frame_data in frames.items():
         ancestors = frame_data.get('ancestors', [])
-        descendants = frame_data.get('descendants', [])
         
         # Find root frames
         if not ancestors:
             hierarchy['roots'].append(frame_name)
+            continue
         
         # Build parent-child relationships
         # Only use ancestor relationships to avoid duplication
-        # (since each frame lists its ancestors, we don't need to also process descendants)
-        for ancestor in ancestors:
-            hierarchy['children'][ancestor].add(frame_name)
-            hierarchy['parents'][frame_name].add(ancestor)
-    
-    # Convert sets to sorted lists and defaultdicts to regular dicts for JSON serialization
-    hierarchy['children'] = {k: sorted(list(v)) for k, v in hierarchy['children'].items()}
-    hierarchy['parents'] = {k: sorted(list(v)) for k, v in hierarchy['parents'].items()}
-    
-    # Remove duplicates from roots
-    hierarchy['roots'] = sorted(list(set(hierarchy['roots'])))
+        # (since each frame lists its ancestors, we don't need to also process descendants).
+        # Frame names are unique, so deduplicating each frame's own ancestor list
+        # is enough to keep every children list free of duplicates too.
+        parents = list(dict.fromkeys(ancestors))
+        hierarchy['parents'][frame_name] = parents
+        for ancestor in parents:
+            children[ancestor].append(frame_name)
+    
+    # Sort lists and convert the defaultdict to a regular dict for JSON serialization
+    hierarchy['children'] = {k: sorted(v) for k, v in children.items()}
+    for parents in hierarchy['parents'].values():
+        parents.sort()
+    hierarchy['roots'].sort()
     
     return hierarchy
 
@@ -79,20 +99,22 @@ def create_hierarchy_index(frames):
 def create_search_index(frames):
     """Create search index for frame semantic search."""
     search_entries = []
+    append = search_entries.append
     
     for frame_name, frame_data in frames.items():
+        all_roles = frame_data['all_roles']
+        
         # Create search entry for each frame
-        entry = {
+        append({
             'id': frame_name,
             'frame_name': frame_name,
             'frame_definition': frame_data['definition'],
-            'core_roles': list(frame_data['core_roles'].keys()),
-            'all_roles': list(frame_data['all_roles'].keys()),
-            'role_definitions': ' '.join(frame_data['all_roles'].values()),
+            'core_roles': list(frame_data['core_roles']),
+            'all_roles': list(all_roles),
+            'role_definitions': ' '.join(all_roles.values()),
             'ancestors': frame_data['ancestors'],
             'descendants': frame_data['descendants']
-        }
-        search_entries.append(entry)
+        })
     
     return search_entries
 
@@ -116,8 +138,8 @@ def main():
     output_path.mkdir(parents=True, exist_ok=True)
     
     print(f"Loading ontology from {input_path}...")
-    with open(input_path, 'r', encoding='utf-8') as f:
-        ontology = json.load(f)
+    with open(input_path, 'rb') as f:
+        ontology = loads_json(f.read())
     
     print(f"Processing {len(ontology)} frames...")
     
@@ -134,20 +156,20 @@ def main():
     
     # Save processed frames
     frames_file = output_path / 'frames.json'
-    with open(frames_file, 'w', encoding='utf-8') as f:
-        json.dump(processed_frames, f, indent=2)
+    with open(frames_file, 'wb') as f:
+        f.write(dumps_json(processed_frames, indent=True))
     print(f"Saved processed frames to {frames_file}")
     
     # Save hierarchy index
     hierarchy_file = output_path / 'hierarchy.json'
-    with open(hierarchy_file, 'w', encoding='utf-8') as f:
-        json.dump(hierarchy, f, indent=2)
+    with open(hierarchy_file, 'wb') as f:
+        f.write(dumps_json(hierarchy, indent=True))
     print(f"Saved hierarchy index to {hierarchy_file}")
     
     # Save search index
     search_file = output_path / 'search_index.json'
-    with open(search_file, 'w', encoding='utf-8') as f:
-        json.dump(search_index, f, separators=(',', ':'))
+    with open(search_file, 'wb') as f:
+        f.write(dumps_json(search_index))
     print(f"Saved search index to {search_file}")
     
     # Create metadata
@@ -160,8 +182,8 @@ def main():
     }
     
     metadata_file = output_path / 'metadata.json'
-    with open(metadata_file, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2)
+    with open(metadata_file, 'wb') as f:
+        f.write(dumps_json(metadata, indent=True))
     
     print(f"\nOntology processing complete!")
     print(f"Total frames: {metadata['total_frames']}")
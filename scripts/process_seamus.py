@@ -14,19 +14,136 @@ import json
 import os
 import sys
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 import argparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Field names of the instance mapping entries, in tuple order
+INSTANCE_MAPPING_FIELDS = ('seamus_id', 'idx', 'report_summary', 'combined_summary')
+
+# Zstandard level for the optional .json.zst chunk copies; optimize_build.py
+# recompresses large files at level 19 for deployment
+ZSTD_LEVEL = 3
+
+# Instances sent to a worker process per task
+WORKER_CHUNKSIZE = 512
+
+# Buffer size for the search index, which is written one small entry at a time
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def loads_json(data):
+    """Parse JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(obj, indent=False):
+    """Serialize an object to UTF-8 JSON bytes, compact or indented by two spaces.
+    
+    SeamusInstance records are serialized as objects with their fields in
+    declaration order (natively by orjson).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, default=instance_to_dict).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), default=instance_to_dict).encode('utf-8')
+
+
+@dataclass
+class SeamusInstance:
+    """A processed SEAMuS instance, as written to the chunk files.
+    
+    Slotted to avoid a per-instance __dict__. frame_definitions and
+    role_definitions are None when no ontology is available.
+    """
+    __slots__ = (
+        'id', 'instance_ids', 'report_summary', 'report_summary_template',
+        'combined_summary', 'combined_summary_template', 'template_roles',
+        'annotations', 'split', 'frames', 'frame_definitions', 'role_definitions'
+    )
+    
+    id: str
+    instance_ids: list
+    report_summary: str
+    report_summary_template: dict
+    combined_summary: str
+    combined_summary_template: dict
+    template_roles: dict
+    annotations: list
+    split: str
+    frames: list
+    frame_definitions: dict
+    role_definitions: dict
+
+
+def instance_to_dict(obj):
+    """json.dumps default hook for SeamusInstance records."""
+    if isinstance(obj, SeamusInstance):
+        return {name: getattr(obj, name) for name in SeamusInstance.__slots__}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if msgspec is not None:
+    class FrameDefinition(msgspec.Struct):
+        """The parts of an ontology frame used for enrichment.
+        
+        Decoding frames.json straight into this struct skips the fields
+        enrichment never reads (ancestors, descendants, core_roles, ...).
+        """
+        definition: Any = ''
+        all_roles: Any = None
+    
+    _decode_ontology = msgspec.json.Decoder(Dict[str, FrameDefinition]).decode
+else:
+    @dataclass
+    class FrameDefinition:
+        """The parts of an ontology frame used for enrichment."""
+        __slots__ = ('definition', 'all_roles')
+        
+        definition: Any
+        all_roles: Any
+    
+    def _decode_ontology(data):
+        return {
+            frame: FrameDefinition(frame_data.get('definition', ''), frame_data.get('all_roles'))
+            for frame, frame_data in loads_json(data).items()
+        }
+
 
 def load_ontology(ontology_path):
-    """Load processed ontology data."""
+    """Load processed ontology data as a mapping of frame name to FrameDefinition."""
     frames_file = ontology_path / 'frames.json'
     if not frames_file.exists():
         print(f"Warning: Ontology file {frames_file} not found. Running without ontology enrichment.")
         return None
     
-    with open(frames_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return _decode_ontology(frames_file.read_bytes())
 
 
 def load_famus_frames(famus_path):
@@ -36,87 +153,255 @@ def load_famus_frames(famus_path):
         print(f"Warning: FAMuS frame index not found. Cannot link frames to SEAMuS instances.")
         return None
     
-    with open(frame_index_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return loads_json(frame_index_file.read_bytes())
+
+
+def iter_instances(f):
+    """Return an iterator over the instances in an open SEAMuS split file.
+    
+    Split files are either a JSON array of instances or an object holding the
+    array under 'data'. With ijson installed the instances are parsed one at a
+    time; otherwise the whole file is loaded. Returns None for any other format.
+    """
+    if ijson is None:
+        data = loads_json(f.read())
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and 'data' in data:
+            return data['data']
+        return None
+    
+    # Peek at the first non-whitespace byte to pick the array's prefix
+    first = b''
+    while not first:
+        block = f.read(4096)
+        if not block:
+            return None
+        first = block.lstrip()[:1]
+    f.seek(0)
+    
+    if first == b'[':
+        return ijson.items(f, 'item', use_float=True)
+    if first == b'{':
+        return ijson.items(f, 'data.item', use_float=True)
+    return None
 
 
 def extract_frame_from_instance_id(instance_id):
     """Extract frame name from FAMuS instance ID.
     Example: 'EN-1282-352-frame-Abandonment' -> 'Abandonment'
     """
-    parts = instance_id.split('-frame-')
-    if len(parts) == 2:
-        return parts[1]
+    _, sep, frame = instance_id.partition('-frame-')
+    # Only IDs with exactly one '-frame-' separator carry a frame name
+    if sep and '-frame-' not in frame:
+        return frame
     return None
 
 
+# Frame and role definitions already resolved against _definitions_ontology,
+# keyed by (frames, template role names)
+_definitions_ontology = None
+_definitions_cache = {}
+
+
+def resolve_definitions(ontology, frames, template_keys):
+    """Return (frame_definitions, role_definitions) for a set of frames.
+    
+    Many instances share the same frames and template roles, so results are
+    cached and the same dicts are returned for repeated inputs; callers must
+    treat them as read-only.
+    """
+    global _definitions_ontology, _definitions_cache
+    if ontology is not _definitions_ontology:
+        _definitions_ontology = ontology
+        _definitions_cache = {}
+    
+    key = (frames, template_keys)
+    definitions = _definitions_cache.get(key)
+    if definitions is not None:
+        return definitions
+    
+    frame_definitions = {}
+    role_definitions = {}
+    for frame in frames:
+        frame_data = ontology.get(frame)
+        if frame_data is None:
+            continue
+        frame_definitions[frame] = frame_data.definition
+        
+        # Collect role definitions for template roles
+        all_roles = frame_data.all_roles or {}
+        role_definitions.update((role, all_roles[role]) for role in template_keys & all_roles.keys())
+    
+    definitions = _definitions_cache[key] = (frame_definitions, role_definitions)
+    return definitions
+
+
 def process_seamus_instance(instance, ontology=None, famus_frames=None):
     """Process a single SEAMuS instance with optional ontology enrichment."""
+    get = instance.get
+    
     # Get instance_id - handle both singular and plural forms
-    instance_id = instance.get('instance_id', '')
-    instance_ids = [instance_id] if instance_id else instance.get('instance_ids', [])
-    
-    processed = {
-        'id': instance_id,  # Use instance_id as the id
-        'instance_ids': instance_ids,
-        'report_summary': instance.get('report_summary', ''),
-        'report_summary_template': instance.get('report_summary_template', {}),
-        'combined_summary': instance.get('combined_summary', ''),
-        'combined_summary_template': instance.get('combined_summary_template', {}),
-        'template_roles': instance.get('template_roles', {}),
-        'annotations': instance.get('annotations', []),
-        'split': instance.get('split', 'unknown'),
-        'frames': []  # Frames associated with this SEAMuS instance
+    instance_id = get('instance_id', '')
+    instance_ids = [instance_id] if instance_id else get('instance_ids', [])
+    
+    # Split, frame and role names repeat across instances, so they are interned
+    intern = sys.intern
+    template_roles = {
+        intern(role): role_data
+        for role, role_data in get('template_roles', {}).items()
     }
     
     # Extract frames from instance IDs
     frame_set = set()
-    for instance_id in processed['instance_ids']:
-        frame = extract_frame_from_instance_id(instance_id)
+    for famus_id in instance_ids:
+        frame = extract_frame_from_instance_id(famus_id)
         if frame:
-            frame_set.add(frame)
+            frame_set.add(intern(frame))
     
-    processed['frames'] = list(frame_set)
+    frames = list(frame_set)
     
     # Enrich with ontology data if available
+    frame_definitions = None
+    role_definitions = None
     if ontology:
-        processed['frame_definitions'] = {}
-        processed['role_definitions'] = {}
-        
-        for frame in processed['frames']:
-            if frame in ontology:
-                frame_data = ontology[frame]
-                processed['frame_definitions'][frame] = frame_data.get('definition', '')
-                
-                # Collect role definitions for template roles
-                all_roles = frame_data.get('all_roles', {})
-                for role in processed['template_roles']:
-                    if role in all_roles:
-                        processed['role_definitions'][role] = all_roles[role]
+        frame_definitions, role_definitions = resolve_definitions(
+            ontology, frozenset(frame_set), frozenset(template_roles)
+        )
+    
+    return SeamusInstance(
+        id=instance_id,  # Use instance_id as the id
+        instance_ids=instance_ids,
+        report_summary=get('report_summary', ''),
+        report_summary_template=get('report_summary_template', {}),
+        combined_summary=get('combined_summary', ''),
+        combined_summary_template=get('combined_summary_template', {}),
+        template_roles=template_roles,
+        annotations=get('annotations', []),
+        split=intern(get('split', 'unknown')),
+        frames=frames,  # Frames associated with this SEAMuS instance
+        frame_definitions=frame_definitions,
+        role_definitions=role_definitions
+    )
+
+
+# Lookup data shared with worker processes, set once per worker by init_worker
+_worker_ontology = None
+_worker_famus_frames = None
+
+
+def init_worker(ontology, famus_frames):
+    """Store the lookup data in a worker process so it is not re-sent per task."""
+    global _worker_ontology, _worker_famus_frames
+    _worker_ontology = ontology
+    _worker_famus_frames = famus_frames
+
+
+def process_seamus_worker(instance):
+    """Process one SEAMuS instance using the worker's lookup data."""
+    return process_seamus_instance(instance, _worker_ontology, _worker_famus_frames)
+
+
+def iter_processed_instances(instances, split, ontology=None, famus_frames=None,
+                             executor=None, workers=1):
+    """Yield processed instances of one split in input order.
+    
+    With an executor, instances are mapped in windows of workers *
+    WORKER_CHUNKSIZE, with the next window submitted before the current one
+    is yielded. executor.map submits its whole input up front, so this keeps
+    the streamed split from being drained into pending work items.
+    """
+    def tagged():
+        for instance in instances:
+            instance['split'] = split
+            yield instance
+    
+    if executor is None:
+        for instance in tagged():
+            yield process_seamus_instance(instance, ontology, famus_frames)
+        return
     
-    return processed
+    tagged_instances = tagged()
+    window = workers * WORKER_CHUNKSIZE
+    pending = None
+    while True:
+        batch = list(islice(tagged_instances, window))
+        results = None
+        if batch:
+            results = executor.map(process_seamus_worker, batch, chunksize=WORKER_CHUNKSIZE)
+        if pending is not None:
+            yield from pending
+        if results is None:
+            return
+        pending = results
 
 
-def create_instance_mapping(seamus_data):
-    """Create mapping from FAMuS instance_id to SEAMuS entries."""
-    instance_to_seamus = defaultdict(list)
+def add_instance_mapping(instance_to_seamus, idx, entry):
+    """Record a SEAMuS entry under each FAMuS instance_id it links to.
     
-    for idx, entry in enumerate(seamus_data):
-        for instance_id in entry.get('instance_ids', []):
-            instance_to_seamus[instance_id].append({
-                'seamus_id': entry['id'],
-                'idx': idx,
-                'report_summary': entry.get('report_summary', ''),
-                'combined_summary': entry.get('combined_summary', '')
-            })
+    Entries are kept as tuples ordered like INSTANCE_MAPPING_FIELDS while
+    ingesting; expand_instance_mapping turns them into dicts for output.
+    """
+    mapping_entry = (entry.id, idx, entry.report_summary, entry.combined_summary)
+    for instance_id in entry.instance_ids:
+        instance_to_seamus.setdefault(instance_id, []).append(mapping_entry)
+
+
+def expand_instance_mapping(instance_to_seamus):
+    """Convert mapping entry tuples to the dicts the explorer expects."""
+    return {
+        instance_id: [dict(zip(INSTANCE_MAPPING_FIELDS, entry)) for entry in entries]
+        for instance_id, entries in instance_to_seamus.items()
+    }
+
+
+def create_search_entry(idx, instance):
+    """Create the summary search index entry for a processed instance.
     
-    return dict(instance_to_seamus)
+    Empty definition and role collections share the empty tuple (serialized
+    as []) instead of allocating a new list per entry.
+    """
+    frame_definitions = instance.frame_definitions
+    template_roles = instance.template_roles
+    
+    return {
+        'id': idx,
+        'seamus_id': instance.id,
+        'report_summary': instance.report_summary,
+        'combined_summary': instance.combined_summary,
+        'instance_ids': instance.instance_ids,
+        'num_instances': len(instance.instance_ids),
+        'frames': instance.frames,
+        'frame_definitions': list(frame_definitions.values()) if frame_definitions else (),
+        'template_roles': list(template_roles) if template_roles else ()
+    }
 
 
-def chunk_data(data, chunk_size=1000):
-    """Split data into chunks for pagination."""
-    for i in range(0, len(data), chunk_size):
-        yield data[i:i + chunk_size]
+def write_bytes(path, data):
+    """Write bytes to a file with raw os.write calls, bypassing Python's buffered I/O."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def write_chunk(output_path, idx, chunk, zstd=False):
+    """Write a chunk to chunk_XXXX.json and return its length.
+    
+    With zstd, a Zstandard-compressed copy is also written to
+    chunk_XXXX.json.zst. A compressor is created per call because chunks are
+    written from several threads and compressors are not thread-safe.
+    """
+    data = dumps_json(chunk)
+    chunk_file = output_path / f'chunk_{idx:04d}.json'
+    write_bytes(chunk_file, data)
+    if zstd:
+        compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        write_bytes(chunk_file.with_name(chunk_file.name + '.zst'), compressed)
+    return len(chunk)
 
 
 def main():
@@ -131,8 +416,16 @@ def main():
                         help='Directory containing processed FAMuS data')
     parser.add_argument('--chunk-size', type=int, default=1000,
                         help='Number of records per JSON file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for instance processing (default: 1, in-process)')
+    parser.add_argument('--zstd', action='store_true',
+                        help='Also write .json.zst copies of the chunk files (requires zstandard)')
     args = parser.parse_args()
     
+    if args.zstd and zstandard is None:
+        print("Warning: zstandard is not installed, skipping .zst output (pip install zstandard)")
+        args.zstd = False
+    
     input_path = Path(args.input_dir)
     output_path = Path(args.output_dir)
     ontology_path = Path(args.ontology_dir)
@@ -145,80 +438,93 @@ def main():
     ontology = load_ontology(ontology_path)
     famus_frames = load_famus_frames(famus_path)
     
-    # Process all splits
-    all_instances = []
+    # Process all splits, writing each chunk as soon as it fills. The FAMuS
+    # instance mapping, search index and counts are built in the same pass,
+    # so processed instances are only held until their chunk is written.
     splits = ['train', 'dev', 'test']
+    split_counts = Counter()
+    total_instances = 0
+    total_famus_links = 0
+    instance_mapping = {}
+    chunk = []
+    chunk_writes = []
     
-    for split in splits:
-        split_file = input_path / f'{split}.json'
-        if not split_file.exists():
-            print(f"Warning: {split_file} not found, skipping...")
-            continue
+    executor = None
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                       initargs=(ontology, famus_frames))
+    
+    # Full chunks are serialized and written on a thread pool, overlapping
+    # file writes with processing. The search index is streamed out as a JSON
+    # array (the site fetches it whole), one encoded entry at a time.
+    with open(output_path / 'search_index.json', 'wb', buffering=WRITE_BUFFER_SIZE) as search_file, \
+            ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as file_writer:
+        search_file.write(b'[')
+        try:
+            for split in splits:
+                split_file = input_path / f'{split}.json'
+                if not split_file.exists():
+                    print(f"Warning: {split_file} not found, skipping...")
+                    continue
+                
+                print(f"Processing {split} split...")
+                with open(split_file, 'rb') as f:
+                    # Handle both list and dict formats
+                    instances = iter_instances(f)
+                    if instances is None:
+                        print(f"Warning: Unexpected format in {split_file}")
+                        continue
+                    
+                    for processed in iter_processed_instances(
+                            instances, split, ontology, famus_frames, executor, args.workers):
+                        idx = total_instances
+                        total_instances += 1
+                        split_counts[split] += 1
+                        total_famus_links += len(processed.instance_ids)
+                        
+                        add_instance_mapping(instance_mapping, idx, processed)
+                        if idx:
+                            search_file.write(b',')
+                        search_file.write(dumps_json(create_search_entry(idx, processed)))
+                        
+                        chunk.append(processed)
+                        if len(chunk) == args.chunk_size:
+                            chunk_writes.append(file_writer.submit(
+                                write_chunk, output_path, len(chunk_writes), chunk, args.zstd
+                            ))
+                            chunk = []
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        search_file.write(b']')
+        
+        # Flush the final partial chunk
+        if chunk:
+            chunk_writes.append(file_writer.submit(
+                write_chunk, output_path, len(chunk_writes), chunk, args.zstd
+            ))
         
-        print(f"Processing {split} split...")
-        with open(split_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # Handle both list and dict formats
-            if isinstance(data, list):
-                instances = data
-            elif isinstance(data, dict) and 'data' in data:
-                instances = data['data']
-            else:
-                print(f"Warning: Unexpected format in {split_file}")
-                continue
-            
-            for instance in instances:
-                instance['split'] = split
-                processed = process_seamus_instance(instance, ontology, famus_frames)
-                all_instances.append(processed)
-    
-    print(f"Processed {len(all_instances)} SEAMuS instances total")
+        print(f"Processed {total_instances} SEAMuS instances total")
+        
+        for idx, write_future in enumerate(chunk_writes):
+            print(f"Saved chunk {idx} with {write_future.result()} instances")
     
     # Create metadata
     metadata = {
-        'total_instances': len(all_instances),
+        'total_instances': total_instances,
         'chunk_size': args.chunk_size,
-        'num_chunks': (len(all_instances) + args.chunk_size - 1) // args.chunk_size,
-        'splits': {split: sum(1 for inst in all_instances if inst['split'] == split) 
-                   for split in splits},
-        'total_famus_links': sum(len(inst['instance_ids']) for inst in all_instances)
+        'num_chunks': len(chunk_writes),
+        'splits': {split: split_counts[split] for split in splits},
+        'total_famus_links': total_famus_links
     }
     
     # Save metadata
-    with open(output_path / 'metadata.json', 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2)
-    
-    # Save chunked data
-    for idx, chunk in enumerate(chunk_data(all_instances, args.chunk_size)):
-        chunk_file = output_path / f'chunk_{idx:04d}.json'
-        with open(chunk_file, 'w', encoding='utf-8') as f:
-            json.dump(chunk, f, separators=(',', ':'))
-        print(f"Saved chunk {idx} with {len(chunk)} instances")
-    
-    # Create FAMuS instance mapping
-    instance_mapping = create_instance_mapping(all_instances)
-    with open(output_path / 'instance_mapping.json', 'w', encoding='utf-8') as f:
-        json.dump(instance_mapping, f, indent=2)
-    
-    # Create search index for summaries
-    search_data = []
-    for idx, instance in enumerate(all_instances):
-        search_entry = {
-            'id': idx,
-            'seamus_id': instance['id'],
-            'report_summary': instance['report_summary'],
-            'combined_summary': instance['combined_summary'],
-            'instance_ids': instance['instance_ids'],
-            'num_instances': len(instance['instance_ids']),
-            'frames': instance['frames'],
-            'frame_definitions': list(instance.get('frame_definitions', {}).values()),
-            'template_roles': list(instance.get('template_roles', {}).keys())
-        }
-        search_data.append(search_entry)
+    (output_path / 'metadata.json').write_bytes(dumps_json(metadata, indent=True))
     
-    with open(output_path / 'search_index.json', 'w', encoding='utf-8') as f:
-        json.dump(search_data, f, separators=(',', ':'))
+    (output_path / 'instance_mapping.json').write_bytes(
+        dumps_json(expand_instance_mapping(instance_mapping), indent=True)
+    )
     
     print(f"\nProcessing complete!")
     print(f"Output saved to: {output_path}")